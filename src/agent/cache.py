@@ -0,0 +1,195 @@
+"""
+Response and plan caching for agent nodes.
+
+Provides a two-tier (exact-match and embedding-similarity) cache that lets
+agent nodes skip LLM calls for repeated or near-duplicate user requests,
+and helpers for caching router plans by request keywords.
+"""
+
+import re
+import sys
+from collections import OrderedDict
+from typing import Any, Optional
+
+import xxhash
+import numpy as np
+
+from langchain_core.embeddings import Embeddings
+
+AGENT_NAMES: tuple[str, ...] = ("sql_writer", "insight_generator", "answer_summarizer", "general_question")
+
+STOPWORDS: frozenset[str] = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "could", "do", "does", "for", "from", "give",
+    "hello", "hi", "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "our", "please", "show",
+    "that", "the", "this", "to", "us", "we", "what", "which", "with", "would", "you", "your"
+})
+
+def keyword_fingerprint(request: str) -> str:
+    """Build an order-insensitive fingerprint from request keywords.
+
+    Args:
+        request: Raw user request.
+
+    Returns:
+        Sorted unique keywords joined by spaces.
+    """
+    tokens = re.findall(r"[a-z0-9_]+", request.lower())
+    return " ".join(sorted({t for t in tokens if len(t) > 2 and t not in STOPWORDS}))
+
+def parse_routing_plan(routing_plan: Optional[str]) -> list[str]:
+    """Extract the ordered list of agent names mentioned in a routing plan, interned for identity compares."""
+    if not routing_plan:
+        return []
+    return [sys.intern(name) for name in re.findall(r"\b(" + "|".join(AGENT_NAMES) + r")\b", routing_plan)]
+
+class SemanticResponseCache:
+    """Two-tier cache of LLM responses keyed by prompt namespace and user request.
+
+    Exact hits are resolved by a hash of the namespace and the normalized request
+    from a bounded LRU store. On an exact miss, the request embedding is compared
+    against cached requests of the same namespace and the closest one is returned
+    if similar enough.
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 1024,
+        max_namespaces: int = 64
+    ) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            embeddings: Embedding model for the semantic tier. Only exact matches are served when omitted.
+            similarity_threshold: Minimal cosine similarity for a semantic hit.
+            max_entries: Maximum number of exact entries, and of semantic entries per namespace.
+            max_namespaces: Maximum number of namespaces in the semantic tier, least recently used are evicted.
+        """
+
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.max_namespaces = max_namespaces
+
+        self._exact: OrderedDict[str, Any] = OrderedDict()
+        self._vectors: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._values: dict[str, list[Any]] = {}
+
+        # Embeddings computed on lookup misses, reused by later lookups and when the response is stored
+        self._pending: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    @staticmethod
+    def normalize(request: str) -> str:
+        """Normalize request casing and whitespace."""
+        return " ".join(request.lower().split())
+
+    @staticmethod
+    def namespace_prefix(*parts: str) -> xxhash.xxh3_128:
+        """Pre-hash the leading namespace parts shared by many namespaces."""
+        return xxhash.xxh3_128("\x1f".join(parts).encode("utf-8"))
+
+    @staticmethod
+    def extend_namespace(prefix: xxhash.xxh3_128, *parts: str) -> str:
+        """Build a namespace key from a `namespace_prefix()` state and the remaining parts, e.g. prompt text."""
+        hasher = prefix.copy()
+
+        for part in parts:
+            hasher.update(b"\x1f" + part.encode("utf-8"))
+
+        return hasher.hexdigest()
+
+    def _key(self, namespace: str, request: str) -> str:
+        return xxhash.xxh3_64_hexdigest(namespace + self.normalize(request))
+
+    async def _embed(self, request: str) -> Optional[np.ndarray]:
+        # The cache is an optimization, an unavailable embedding endpoint must not fail the request
+        try:
+            vector = np.asarray(await self.embeddings.aembed_query(request), dtype=np.float32)
+        except Exception as e:
+            print(f"Request embedding failed, semantic cache is skipped: {e}")
+            return None
+
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    async def aget(self, namespace: str, request: str, semantic: bool = True) -> Optional[Any]:
+        """Look up a cached response.
+
+        Args:
+            namespace: Namespace key produced by `extend_namespace()`.
+            request: Raw user request.
+            semantic: Whether a similar request may be served on an exact miss.
+
+        Returns:
+            Cached response or None on miss.
+        """
+
+        if (key := self._key(namespace, request)) in self._exact:
+            self._exact.move_to_end(key)
+            return self._exact[key]
+
+        if self.embeddings is None or not semantic:
+            return None
+
+        normalized = self.normalize(request)
+
+        if (query := self._pending.get(normalized)) is None:
+            if (query := await self._embed(normalized)) is None:
+                return None
+
+            self._pending[normalized] = query
+
+            if len(self._pending) > self.max_entries:
+                self._pending.popitem(last=False)
+
+        if (matrix := self._vectors.get(namespace)) is None:
+            return None
+
+        self._vectors.move_to_end(namespace)
+        scores = matrix @ query
+        best = int(scores.argmax())
+
+        if scores[best] >= self.similarity_threshold:
+            return self._values[namespace][best]
+
+        return None
+
+    async def aset(self, namespace: str, request: str, value: Any, semantic: bool = True) -> None:
+        """Store a response for the request.
+
+        Args:
+            namespace: Namespace key produced by `extend_namespace()`.
+            request: Raw user request.
+            value: Serialized response to cache.
+            semantic: Whether to index the response for similar requests too.
+        """
+
+        key = self._key(namespace, request)
+        self._exact[key] = value
+        self._exact.move_to_end(key)
+
+        if len(self._exact) > self.max_entries:
+            self._exact.popitem(last=False)
+
+        if self.embeddings is None or not semantic:
+            return
+
+        normalized = self.normalize(request)
+        vector = self._pending.get(normalized)
+
+        if vector is None and (vector := await self._embed(normalized)) is None:
+            return
+
+        if (matrix := self._vectors.get(namespace)) is None:
+            self._vectors[namespace] = vector[np.newaxis, :]
+            self._values[namespace] = [value]
+
+            # Namespaces embedding request-specific state are mostly single-use, so their number is bounded too
+            if len(self._vectors) > self.max_namespaces:
+                evicted, _ = self._vectors.popitem(last=False)
+                del self._values[evicted]
+        else:
+            # Oldest semantic entries are evicted first
+            self._vectors[namespace] = np.vstack([matrix, vector])[-self.max_entries:]
+            self._values[namespace] = (self._values[namespace] + [value])[-self.max_entries:]
+            self._vectors.move_to_end(namespace)
@@ -6,13 +6,16 @@ insight generator, answer summarizer) to handle analytical queries about
 coffee shop operations and database.
 """
 
+import sys
 import uuid
-from typing import Literal
+import asyncio
+from typing import Literal, Optional
 
 from langchain_openai import ChatOpenAI
-from langchain_core.output_parsers import PydanticOutputParser, StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableConfig
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import SystemMessage, AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.state import CompiledStateGraph
@@ -22,16 +25,27 @@ from models.io import (
     SQLWriterOutput,
     InsightGeneratorOutput,
     AnswerSummarizerOutput,
+    RoutingDecision,
 )
-from models.state import MultiAgentWorkflow
+from models.state import MultiAgentWorkflow, AGENT_BITS, decode_visited_mask
 from models.prompts import meta_prompts_store
 from database.manager import PostgresAlchemyManager
-from database.schemas import SessionTracing
+from database.schemas import SessionTracing, PlanCache
 from agent.toolkit import (
     search_postgres_database,
     read_provided_data,
+    register_database_manager,
+    rows_to_columnar,
     with_fallback
 )
+from agent.cache import (
+    SemanticResponseCache,
+    keyword_fingerprint,
+    parse_routing_plan
+)
+
+# Router prompt budget for state fed back on every hop
+ROUTER_INSIGHTS_LIMIT: int = 500
 
 class CoffeeShopAnalystAsistant:
     """
@@ -45,7 +59,12 @@ class CoffeeShopAnalystAsistant:
         llm: ChatOpenAI,
         database_manager: PostgresAlchemyManager,
         max_interactions_count: int = 5,
-        fallback_temperature: float = 0.3
+        fallback_temperature: float = 0.3,
+        embeddings: Optional[Embeddings] = None,
+        cache_similarity_threshold: float = 0.95,
+        cache_max_entries: int = 1024,
+        prompt_cache_control: Optional[dict] = None,
+        structured_output_method: Literal["json_schema", "function_calling"] = "json_schema"
     ) -> None:
         """Initialize the coffee shop analyst assistant.
 
@@ -54,64 +73,208 @@ class CoffeeShopAnalystAsistant:
             database_manager: Manager for PostgreSQL database operations.
             max_interactions_count: Maximum number of agent interactions before forcing summarization.
             fallback_temperature: Temperature setting for fallback LLM when parsing fails.
+            embeddings: Embedding model for semantic response caching. Only exact matches are cached when omitted.
+            cache_similarity_threshold: Minimal cosine similarity between requests for a semantic cache hit.
+            cache_max_entries: Maximum number of cached responses kept in memory.
+            prompt_cache_control: Provider cache-control marker attached to static system prompts,
+                e.g. {"type": "ephemeral"} for Anthropic-compatible backends.
+            structured_output_method: Provider mechanism enforcing agent output schemas.
+                Use 'function_calling' for backends without JSON-schema constrained decoding.
         """
 
         self.llm = llm
         self.prompts = meta_prompts_store
-        self.graph = StateGraph(MultiAgentWorkflow)
         self.max_interactions_count = max_interactions_count
         self.database_manager = database_manager
+        self.response_cache = SemanticResponseCache(embeddings, cache_similarity_threshold, cache_max_entries)
+        self.prompt_cache_control = prompt_cache_control
+
+        # Invariant namespace parts are hashed once, only the state-dependent tail is encoded per call
+        self._namespace_prefix = self.response_cache.namespace_prefix(self.prompts.version, self.llm.model_name)
+        self._simple_qa_namespace = self.response_cache.extend_namespace(
+            self._namespace_prefix, self.prompts.simple_qa_prompt
+        )
+
+        # Router plans keyed by prompt version, model name and request keyword fingerprint, replayed without LLM calls
+        self.plan_cache: dict[str, list[str]] = {}
+        self._plan_key_prefix = f"{self.prompts.version}:{self.llm.model_name}:"
+        self._unsaved_plans: set[str] = set()
+        self._stale_plans: set[str] = set()
+        self._persist_plans = True
 
-        # Providing access for tools
+        # Providing access for tools, sharing the database connection pool with them
+        register_database_manager(self.database_manager)
         toolkit = [search_postgres_database, read_provided_data]
         self.tools = {_tool.name: _tool for _tool in toolkit}
 
-        # Setting up fallback LLM with increased 'temperature'
-        self.fallback_llm = self.llm.with_config(
-            RunnableConfig(configurable={"temperature": fallback_temperature})
-        )
+        # Output schemas are enforced by the provider, the fallback one runs with increased 'temperature'
+        output_schemas = {
+            "router": RouterOutput,
+            "sql_writer": SQLWriterOutput,
+            "insight_generator": InsightGeneratorOutput,
+            "answer_summarizer": AnswerSummarizerOutput,
+        }
+        fallback_llm = self.llm.model_copy(update={"temperature": fallback_temperature})
+
+        self.structured_llms = {
+            name: tuple(
+                llm.with_structured_output(schema, method=structured_output_method) for llm in (self.llm, fallback_llm)
+            )
+            for name, schema in output_schemas.items()
+        }
+
+        # Static system prompts are formatted once, so the prefix sent to the provider is byte-identical across turns
+        self.agent_prompts = {
+            "sql_writer": self.prompts.build_sql_writer(db=self.database_manager.database_model_text),
+            "insight_generator": self.prompts.build_insight_generator(db=self.database_manager.database_model_text),
+        }
+
+        # State-dependent prompt tails are passed as 'agent_propmpt' after the static prefix on every call
+        self.templates = {
+            "router": ChatPromptTemplate.from_messages([
+                self._system_message(self.prompts.router_prompt_static),
+                ("system", "{agent_propmpt}"),
+                ("human", "{request}")
+            ]),
+            "sql_writer": ChatPromptTemplate.from_messages([
+                self._system_message(self.agent_prompts["sql_writer"]),
+                ("human", "{request}")
+            ]),
+            # Tool results are passed as 'context' messages after the request
+            "insight_generator": ChatPromptTemplate.from_messages([
+                self._system_message(self.agent_prompts["insight_generator"]),
+                ("human", "{request}"),
+                MessagesPlaceholder("context", optional=True)
+            ]),
+            "answer_summarizer": ChatPromptTemplate.from_messages([
+                self._system_message(self.prompts.answer_summarizer_prompt_static),
+                ("system", "{agent_propmpt}"),
+                ("human", "{request}")
+            ]),
+            "simple_qa": ChatPromptTemplate.from_messages([
+                self._system_message(self.prompts.simple_qa_prompt),
+                ("human", "{request}")
+            ]),
+        }
+
+        # Primary and fallback chains for every templated agent
+        self.chains = {
+            name: tuple(self.templates[name] | llm for llm in self.structured_llms[name])
+            for name in ("router", "sql_writer", "insight_generator", "answer_summarizer")
+        }
+        self.qa_chain = self.templates["simple_qa"] | self.llm | StrOutputParser()
+
+        self._compiled_graph = self._build_graph()
 
     @property
     def compiled_graph(self) -> CompiledStateGraph:
+        """Agent workflow graph compiled once at initialization."""
+        return self._compiled_graph
+
+    def _build_graph(self) -> CompiledStateGraph:
         """Build and compile the agent workflow graph.
 
         Returns:
             Compiled state graph ready for execution.
         """
 
-        self.graph.add_node("router_node", self.router_node, defer=True)
-        self.graph.add_node("sql_writer_node", self.sql_writer_node)
-        self.graph.add_node("insight_generator_node", self.insight_generator_node)
-        self.graph.add_node("answer_summarizer_node", self.answer_summarizer_node)
-        self.graph.add_node("simple_qa_node", self.simple_qa_node)
+        graph = StateGraph(MultiAgentWorkflow)
+
+        graph.add_node("router_node", self.router_node, defer=True)
+        graph.add_node("sql_writer_node", self.sql_writer_node)
+        graph.add_node("insight_generator_node", self.insight_generator_node)
+        graph.add_node("answer_summarizer_node", self.answer_summarizer_node)
+        graph.add_node("simple_qa_node", self.simple_qa_node)
 
-        self.graph.add_edge(START, "router_node")
-        self.graph.add_conditional_edges(
+        graph.add_edge(START, "router_node")
+        graph.add_conditional_edges(
             "router_node",
             self.routing_gate,
             {
                 "sql_writer": "sql_writer_node",
                 "insight_generator": "insight_generator_node",
                 "answer_summarizer": "answer_summarizer_node",
-                "general_question": "simple_qa_node"
+                "general_question": "simple_qa_node",
+                "cached_answer": END
             }
         )
-        self.graph.add_edge("sql_writer_node", "router_node")
-        self.graph.add_edge("insight_generator_node", "router_node")
-        self.graph.add_edge("answer_summarizer_node", END)
-        self.graph.add_edge("simple_qa_node", END)
+        graph.add_edge("sql_writer_node", "router_node")
+        graph.add_edge("insight_generator_node", "router_node")
+        graph.add_edge("answer_summarizer_node", END)
+        graph.add_edge("simple_qa_node", END)
 
-        return self.graph.compile()
+        return graph.compile()
 
-    def routing_gate(self, state: MultiAgentWorkflow) -> Literal[str]:
+    def _system_message(self, text: str) -> SystemMessage:
+        """Wrap a static system prompt, marking it for provider-side prefix caching when enabled."""
+
+        if self.prompt_cache_control is None:
+            return SystemMessage(content=text)
+
+        return SystemMessage(content=[{"type": "text", "text": text, "cache_control": self.prompt_cache_control}])
+
+    async def load_plan_cache(self) -> None:
+        """Warm up the plan cache with plans persisted by previous sessions."""
+
+        # Databases created before the plan cache was introduced lack its table
+        if not await self.database_manager.has_table(PlanCache):
+            print("Plan cache table is missing, re-run 'create_database_structure()' to persist router plans")
+            self._persist_plans = False
+            return
+
+        # Plans recorded under other prompts or models are not replayed
+        for plan in await self.database_manager.load_objects(PlanCache):
+            if plan.fingerprint.startswith(self._plan_key_prefix):
+                self.plan_cache[plan.fingerprint] = [sys.intern(step) for step in plan.routing_steps]
+
+    def drain_plan_cache(self) -> list[PlanCache]:
+        """Collect plans cached during the session that are not persisted yet."""
+
+        plans = [PlanCache(fingerprint=fp, routing_steps=self.plan_cache[fp]) for fp in self._unsaved_plans]
+        self._unsaved_plans.clear()
+        return plans if self._persist_plans else []
+
+    def drain_stale_plans(self) -> list[str]:
+        """Collect keys of plans invalidated during the session that may still be persisted."""
+
+        keys = list(self._stale_plans)
+        self._stale_plans.clear()
+        return keys if self._persist_plans else []
+
+    def _plan_key(self, request: str) -> str:
+        """Plan cache key of the request, empty when the request has no keywords."""
+
+        fingerprint = keyword_fingerprint(request)
+        return self._plan_key_prefix + fingerprint if fingerprint else ""
+
+    def _invalidate_plan(self, state: MultiAgentWorkflow) -> None:
+        """Forget the cached plan the workflow followed, so the router LLM decides again next time."""
+
+        if plan_key := state.get("plan_key"):
+            self.plan_cache.pop(plan_key, None)
+            self._unsaved_plans.discard(plan_key)
+            self._stale_plans.add(plan_key)
+
+    def _answer_namespace(self, routing_decision: str) -> str:
+        """Cache namespace of final answers for requests first routed to the given agent."""
+        return self.response_cache.extend_namespace(self._namespace_prefix, "answer_summarizer", routing_decision)
+
+    def routing_gate(self, state: MultiAgentWorkflow) -> Literal[RoutingDecision, "cached_answer"]:
         """Determine next agent to route to based on workflow state."""
 
+        if state.get("answer") is not None:
+            return "cached_answer"
+
         history = state.get("interactions_history", [])
 
+        # A plan that ran into the loop guard is wrong and must not be replayed
         if len(history) >= self.max_interactions_count:
+            self._invalidate_plan(state)
             return "answer_summarizer"
 
-        if history and state["routing_decision"] == history[-1]:
+        # Agents already visited are not routed to again
+        if AGENT_BITS[state["routing_decision"]] & state.get("visited_mask", 0):
+            self._invalidate_plan(state)
             return "answer_summarizer"
 
         print(f"Routing decision: {state['routing_decision']}")
@@ -121,69 +284,110 @@ class CoffeeShopAnalystAsistant:
     async def simple_qa_node(self, state: MultiAgentWorkflow) -> MultiAgentWorkflow:
         """Answers questions that are too simple or behind the system's scope."""
 
-        node_propmpt = ChatPromptTemplate.from_messages([
-            ("system", self.prompts.simple_qa_prompt),
-            ("human", "{request}")
-        ])
-        chain = node_propmpt | self.llm | StrOutputParser()
-        response: str = await chain.ainvoke({"request": state["request"]})
+        namespace = self._simple_qa_namespace
+        if (cached := await self.response_cache.aget(namespace, state["request"])) is not None:
+            return {"answer": cached, "visited_mask": AGENT_BITS["general_question"]}
+
+        response: str = await self.qa_chain.ainvoke({"request": state["request"]})
 
-        return {"answer": response}
+        await self.response_cache.aset(namespace, state["request"], response)
+
+        return {"answer": response, "visited_mask": AGENT_BITS["general_question"]}
 
     async def router_node(self, state: MultiAgentWorkflow) -> MultiAgentWorkflow:
         """Route user request to appropriate specialist agent."""
 
+        plan_key = self._plan_key(state["request"])
+        first_hop = "cached_plan_steps" not in state
+
+        steps = list(self.plan_cache.get(plan_key, [])) if first_hop else state["cached_plan_steps"]
+
+        # Replay the cached plan instead of asking the LLM for the next step
+        if steps:
+            print(f"Replaying cached routing plan: {steps}")
+            update = {
+                "routing_decision": steps[0],
+                "routing_plan": " -> ".join(steps),
+                "cached_plan_steps": steps[1:]
+            }
+            if first_hop:
+                update["plan_key"] = plan_key
+        else:
+            update = await self._route_with_llm(state, plan_key, first_hop)
+
+        # An already answered request with the same route ends the workflow right away. Only exact repeats qualify,
+        # since similar analytical requests may differ in a parameter, and answers over user files are never reused
+        if first_hop and not update.get("user_data_file"):
+            namespace = self._answer_namespace(update["routing_decision"])
+
+            if (cached := await self.response_cache.aget(namespace, state["request"], semantic=False)) is not None:
+                update["answer"] = AnswerSummarizerOutput.model_validate_json(cached)
+
+        return update
+
+    async def _route_with_llm(self, state: MultiAgentWorkflow, plan_key: str, first_hop: bool) -> MultiAgentWorkflow:
+        """Ask the router LLM for the next step and cache the plan it produces on the first hop."""
+
         na = "Not available yet"
 
-        parser = PydanticOutputParser(pydantic_object=RouterOutput)
+        insights = state.get("insights", na)
 
-        agent_prompt = self.prompts.router_prompt.format(**{
-            "fmt": parser.get_format_instructions(),
-            "sql": state.get("sql", na),
-            "sql_explanation": state.get("sql_explanation", na),
-            "insights": state.get("insights", na),
-            "interactions_history": state.get("interactions_history", []),
-            "routing_plan": state.get("routing_plan", na)
-        })
-        node_prompt = ChatPromptTemplate.from_messages([
-            ("system", "{agent_propmpt}"),
-            ("human", "{request}"),
-        ])
-        response: RouterOutput = await with_fallback(
-            node_prompt | self.llm | parser,
-            node_prompt | self.fallback_llm | parser,
-            {"request": state["request"], "agent_propmpt": agent_prompt}
+        if insights and len(insights) > ROUTER_INSIGHTS_LIMIT:
+            insights = insights[:ROUTER_INSIGHTS_LIMIT] + "..."
+
+        agent_prompt = self.prompts.build_router(
+            visited_agents=", ".join(decode_visited_mask(state.get("visited_mask", 0))) or "none",
+            routing_plan=state.get("routing_plan", na),
+            sql=state.get("sql", na),
+            sql_explanation=state.get("sql_explanation", na),
+            insights=insights
         )
+        # Dynamic prompt embeds the workflow state, so only identical hops share the namespace
+        namespace = self.response_cache.extend_namespace(self._namespace_prefix, agent_prompt)
+
+        # Decisions naming a user file are request-specific, a similar request may point to another file
+        cached = await self.response_cache.aget(namespace, state["request"])
+        response = RouterOutput.model_validate_json(cached) if cached is not None else None
+
+        if response is None or response.user_data_file:
+            response: RouterOutput = await with_fallback(
+                *self.chains["router"],
+                {"request": state["request"], "agent_propmpt": agent_prompt}
+            )
+            if not response.user_data_file:
+                await self.response_cache.aset(namespace, state["request"], response.model_dump_json())
+
         update = {
-            "routing_decision": response.routing_decision,
+            "routing_decision": sys.intern(response.routing_decision),
             "routing_plan": response.routing_plan,
             "user_data_file": response.user_data_file,
+            "cached_plan_steps": [],
             "reasoning_traces": [{"reasoning": response.reasoning, "failure_reason": response.failure_reason}]
         }
+
+        # Plans depending on a user file are request-specific and are not cached
+        plan = parse_routing_plan(response.routing_plan)
+
+        if first_hop and plan_key and plan and plan[0] == response.routing_decision and not response.user_data_file:
+            self.plan_cache[plan_key] = plan
+            self._unsaved_plans.add(plan_key)
+            update["cached_plan_steps"] = plan[1:]
+            update["plan_key"] = plan_key
+
         return update
 
     async def sql_writer_node(self, state: MultiAgentWorkflow) -> MultiAgentWorkflow:
         """Generate SQL queries based on user request."""
 
-        parser = PydanticOutputParser(pydantic_object=SQLWriterOutput)
-
-        agent_prompt = self.prompts.sql_writer_prompt.format(**{
-            "fmt": parser.get_format_instructions(),
-            "db": self.database_manager.database_model,
-        })
-        node_prompt = ChatPromptTemplate.from_messages([
-            ("system", "{agent_propmpt}"),
-            ("human", "{request}")
-        ])
         response: SQLWriterOutput = await with_fallback(
-            node_prompt | self.llm | parser,
-            node_prompt | self.fallback_llm | parser,
-            {"agent_propmpt": agent_prompt, "request": state["request"]}
+            *self.chains["sql_writer"],
+            {"request": state["request"]}
         )
         update = {
             "sql": response.sql,
             "sql_explanation": response.sql_explanation,
-            "interactions_history": state.get("interactions_history", []) + ["sql_writer"],
+            "interactions_history": ["sql_writer"],
+            "visited_mask": AGENT_BITS["sql_writer"],
             "reasoning_traces": [{"reasoning": response.reasoning, "failure_reason": response.failure_reason}]
         }
         return update
@@ -191,43 +395,36 @@ class CoffeeShopAnalystAsistant:
     async def insight_generator_node(self, state: MultiAgentWorkflow) -> MultiAgentWorkflow:
         """Generate insights from data analysis or user-provided data."""
 
-        parser = PydanticOutputParser(pydantic_object=InsightGeneratorOutput)
-
-        agent_prompt = self.prompts.insight_generator_prompt.format(**{
-            "fmt": parser.get_format_instructions(),
-            "db": self.database_manager.database_model,
-        })
-        node_prompt = ChatPromptTemplate.from_messages([
-            ("system", "{agent_propmpt}"),
-            ("human", "{request}")
-        ])
+        context = []
 
         if path := state.get("user_data_file"):
 
-            user_provided_data = self.tools["read_provided_data"].invoke({"path": path})
-            node_prompt.append(("ai", f"User provided data: {user_provided_data}"))
+            # File parsing is blocking, keep the event loop free for concurrent sessions
+            user_provided_data = await asyncio.to_thread(self.tools["read_provided_data"].invoke, {"path": path})
+            user_provided_data = rows_to_columnar(user_provided_data, complete=False)
+            context.append(AIMessage(content=f"User provided data: {user_provided_data}"))
 
         response: InsightGeneratorOutput = await with_fallback(
-            node_prompt | self.llm | parser,
-            node_prompt | self.fallback_llm | parser,
-            {"agent_propmpt": agent_prompt, "request": state["request"]
-        })
+            *self.chains["insight_generator"],
+            {"request": state["request"], "context": context}
+        )
         update = {
             "insights": response.insights,
-            "interactions_history": state.get("interactions_history", []) + ["insight_generator"],
+            "interactions_history": ["insight_generator"],
+            "visited_mask": AGENT_BITS["insight_generator"],
             "reasoning_traces": [{"reasoning": response.reasoning, "failure_reason": response.failure_reason}]
         }
 
         if response.sql and not path:
 
-            queried_data = await self.tools["search_postgres_database"].ainvoke({"statement": response.sql})
-            node_prompt.append(("ai", f"Extracted data: {queried_data}"))
+            rows = await self.tools["search_postgres_database"].ainvoke({"statement": response.sql})
+            queried_data = rows_to_columnar(rows)
+            context.append(AIMessage(content=f"Extracted data: {queried_data}"))
 
             response: InsightGeneratorOutput = await with_fallback(
-                node_prompt | self.llm | parser,
-                node_prompt | self.fallback_llm | parser,
-                {"agent_propmpt": agent_prompt, "request": state["request"]
-            })
+                *self.chains["insight_generator"],
+                {"request": state["request"], "context": context}
+            )
             update |= {
                 "queried_data": queried_data,
                 "insights": response.insights,
@@ -239,29 +436,33 @@ class CoffeeShopAnalystAsistant:
     async def answer_summarizer_node(self, state: MultiAgentWorkflow) -> MultiAgentWorkflow:
         """Summarize results from all agents into final answer."""
 
-        parser = PydanticOutputParser(pydantic_object=AnswerSummarizerOutput)
-
-        node_prompt = ChatPromptTemplate.from_messages([
-            ("system", "{agent_propmpt}"),
-            ("human", "{request}")
-        ])
-        agent_prompt = self.prompts.answer_summarizer_prompt.format(**{
-            "fmt": parser.get_format_instructions(),
-            "sql": state.get("sql"),
-            "sql_explanation": state.get("sql_explanation"),
-            "insights": state.get("insights"),
-            "queried_data": state.get("queried_data"),
-        })
+        agent_prompt = self.prompts.build_summarizer(
+            sql=state.get("sql"),
+            sql_explanation=state.get("sql_explanation"),
+            insights=state.get("insights"),
+            queried_data=state.get("queried_data")
+        )
         response: AnswerSummarizerOutput = await with_fallback(
-            node_prompt | self.llm | parser,
-            node_prompt | self.fallback_llm | parser,
-            {"agent_propmpt": agent_prompt, "request": state["request"]
-        })
+            *self.chains["answer_summarizer"],
+            {"agent_propmpt": agent_prompt, "request": state["request"]}
+        )
         update = {
             "answer": response,
-            "interactions_history": state.get("interactions_history", []) + ["answer_summarizer"],
+            "interactions_history": ["answer_summarizer"],
+            "visited_mask": AGENT_BITS["answer_summarizer"],
             "reasoning_traces": [{"reasoning": response.reasoning, "failure_reason": response.failure_reason}]
         }
+
+        # A plan that ended in a failed answer is not replayed again
+        if response.failure_reason:
+            self._invalidate_plan(state)
+
+        # Answers are cached under the first visited agent, which is the router's first decision for the request
+        if not response.failure_reason and not state.get("user_data_file"):
+            history = state.get("interactions_history", [])
+            namespace = self._answer_namespace(history[0] if history else "answer_summarizer")
+            await self.response_cache.aset(namespace, state["request"], response.model_dump_json(), semantic=False)
+
         return update
 
 
@@ -277,6 +478,7 @@ async def provide_agentic_session(agent: CoffeeShopAnalystAsistant, stopword: st
     farewell = "[Agent] All the best!"
 
     agentic_app = agent.compiled_graph
+    await agent.load_plan_cache()
 
     session_history = []
 
@@ -287,8 +489,8 @@ async def provide_agentic_session(agent: CoffeeShopAnalystAsistant, stopword: st
         session_history.append({
            "answer": state["answer"].answer,
            "request": state["request"],
-           "interactions_history": state["interactions_history"],
-           "reasoning_traces": state["reasoning_traces"]
+           "interactions_history": state.get("interactions_history", []),
+           "reasoning_traces": state.get("reasoning_traces", [])
         })
 
         print(state["answer"].answer)
@@ -298,5 +500,10 @@ async def provide_agentic_session(agent: CoffeeShopAnalystAsistant, stopword: st
     session_trace = SessionTracing(session_id=uuid.uuid4(), session_history=session_history)
     await agent.database_manager.dump_object(session_trace)
 
+    # Plans may already be saved by a concurrent session, they are written apart from the trace.
+    # Invalidated plans are removed first, so a plan recorded again after invalidation is kept
+    await agent.database_manager.delete_objects(PlanCache, agent.drain_stale_plans())
+    await agent.database_manager.dump_new_objects(agent.drain_plan_cache())
+
     print("Session trace dumped successfully!")
     return session_trace
@@ -6,12 +6,15 @@ with fallback support, and database snapshot upload functionality.
 """
 
 import os
+import csv
+import asyncio
+import itertools
 from dotenv import load_dotenv, find_dotenv
 
-import pandas as pd
+import orjson
 
-from typing import Sequence
-from pydantic import BaseModel
+from typing import Sequence, Optional
+from pydantic import BaseModel, ValidationError
 from sqlalchemy import Row
 
 from langchain.tools import tool
@@ -21,6 +24,37 @@ from langchain_core.exceptions import OutputParserException
 from database.manager import PostgresAlchemyManager
 from models.io import DatabaseSearchTool, ReadDataTool
 
+# Environment is read once per process, not on every tool call
+load_dotenv(find_dotenv())
+POSTGRES_DSN: Optional[str] = os.getenv("POSTGRES_DSN")
+
+# Downstream LLM context can't take more rows anyway, shared by file reading and serialization
+MAX_ROWS: int = 100
+
+# Shared manager for database tools, created once per process
+_MANAGER: Optional[PostgresAlchemyManager] = None
+_MANAGER_LOCK = asyncio.Lock()
+
+def register_database_manager(database_manager: PostgresAlchemyManager) -> None:
+    """Share an already initialized database manager with the database tools.
+
+    Args:
+        database_manager: Database manager instance.
+    """
+    global _MANAGER
+    _MANAGER = database_manager
+
+async def _get_manager() -> PostgresAlchemyManager:
+    """Return the shared database manager, creating it from environment on first use."""
+    global _MANAGER
+
+    if _MANAGER is None:
+        async with _MANAGER_LOCK:
+            if _MANAGER is None:
+                _MANAGER = PostgresAlchemyManager(postgres_dsn=POSTGRES_DSN)
+
+    return _MANAGER
+
 @tool("search_postgres_database", args_schema=DatabaseSearchTool)
 async def search_postgres_database(statement: str) -> Sequence[Row]:
     """Execute SQL statement against PostgreSQL database.
@@ -32,13 +66,12 @@ async def search_postgres_database(statement: str) -> Sequence[Row]:
         Query results as sequence of database rows.
     """
 
-    load_dotenv(find_dotenv())
-    manager = PostgresAlchemyManager(postgres_dsn=os.getenv("POSTGRES_DSN"))
+    manager = await _get_manager()
     return await manager.execute_sql_statement(statement.strip())
 
 @tool("read_provided_data", args_schema=ReadDataTool)
 def read_provided_data(path: str = ".data/") -> list[dict]:
-    """Load data from CSV file.
+    """Load up to MAX_ROWS rows from CSV file, plus one more to tell whether the file is longer.
 
     Args:
         path: Path to the CSV file.
@@ -46,36 +79,90 @@ def read_provided_data(path: str = ".data/") -> list[dict]:
     Returns:
         List of dictionaries representing CSV rows.
     """
-    dataframe: pd.DataFrame = pd.read_csv(path)
-    return dataframe.to_dict("records")
+    # 'utf-8-sig' drops a byte order mark that would otherwise stick to the first column name
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(itertools.islice(csv.DictReader(f), MAX_ROWS + 1))
+
+def rows_to_columnar(
+    rows: Sequence[Row] | Sequence[dict],
+    max_rows: int = MAX_ROWS,
+    complete: bool = True
+) -> str:
+    """Serialize query results or CSV records into compact columnar JSON for prompts.
+
+    Args:
+        rows: Database rows or dictionaries sharing the same keys.
+        max_rows: Maximum number of rows to keep.
+        complete: Whether rows hold the whole result, so the number of dropped rows is known.
+
+    Returns:
+        JSON string of the form {"cols": [...], "rows": [[...], ...]}.
+    """
+    if not rows:
+        return orjson.dumps({"cols": [], "rows": []}).decode()
+
+    if isinstance(rows[0], dict):
+        cols = list(rows[0])
+        values = [[row.get(col) for col in cols] for row in rows[:max_rows]]
+    else:
+        cols = list(rows[0]._fields)
+        values = [list(row) for row in rows[:max_rows]]
+
+    payload = {"cols": cols, "rows": values}
+
+    if (rest := len(rows) - max_rows) > 0:
+        payload["truncated"] = f"...(+{rest} more)" if complete else "...(more rows not shown)"
+
+    return orjson.dumps(payload, default=str).decode()
 
 async def with_fallback(
     chain: Runnable,
     fallback_chain: Runnable,
     invocation_kwargs: dict,
-    n_retries: int = 3
+    n_retries: int = 1,
+    backoff: float = 0.1
 ) -> BaseModel:
     """Execute chain with fallback on parsing failure.
 
+    Each attempt tries the primary chain, then the fallback chain. Attempts are
+    separated by exponentially growing pauses. Outputs violating the schema, non-JSON
+    outputs and missing structured outputs count as parsing failures. Other errors
+    (e.g. rejected requests) are not retried.
+
     Args:
         chain: Primary chain to execute.
         fallback_chain: Fallback chain used when primary fails.
         invocation_kwargs: Arguments to pass to chains.
         n_retries: Number of retry attempts.
+        backoff: Pause in seconds after the first failed attempt, doubled for every next one.
 
     Returns:
         Parsed model output from chain execution.
+
+    Raises:
+        OutputParserException | ValidationError: If every attempt failed to produce a parsable output.
     """
 
+    last_exception = OutputParserException("No attempts were made")
+
     for attempt in range(n_retries):
-        try:
-            return await chain.ainvoke(invocation_kwargs)
-        except OutputParserException:
-            result = await fallback_chain.ainvoke(invocation_kwargs)
+        for runnable in (chain, fallback_chain):
+            try:
+                output = await runnable.ainvoke(invocation_kwargs)
+            except (OutputParserException, ValidationError) as e:
+                last_exception = e
+                continue
 
-        return result
-    else:
-        raise OutputParserException
+            # Function calling yields no output when the model answers without calling the schema tool
+            if output is not None:
+                return output
+
+            last_exception = OutputParserException("Model returned no structured output")
+
+        if attempt < n_retries - 1:
+            await asyncio.sleep(backoff * 2 ** attempt)
+
+    raise last_exception
 
 def upload_database_snapshot(
     database_manager: PostgresAlchemyManager,
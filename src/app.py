@@ -10,7 +10,7 @@ import asyncio
 
 from dotenv import load_dotenv, find_dotenv
 
-from langchain_openai import ChatOpenAI
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 from database.manager import PostgresAlchemyManager
 from database.schemas import (
@@ -38,11 +38,21 @@ async def main():
         api_key=os.getenv("LLM_API_KEY"),
         model=os.getenv("MODEL_NAME") or MODEL_NAME
     )
+    # Semantic response cache is enabled only when an embedding model is configured,
+    # requests are sent as text since tiktoken token ids are meaningless to non-OpenAI models
+    embeddings = OpenAIEmbeddings(
+        base_url=os.getenv("BASE_URL"),
+        api_key=os.getenv("LLM_API_KEY"),
+        model=embedding_model,
+        check_embedding_ctx_length=False
+    ) if (embedding_model := os.getenv("EMBEDDING_MODEL")) else None
+
     agent = CoffeeShopAnalystAsistant(
         llm=llm,
         database_manager=database_manager,
         max_interactions_count=5,
-        fallback_temperature=0.3
+        fallback_temperature=0.3,
+        embeddings=embeddings
     )
 
     trace: SessionTracing = await provide_agentic_session(agent=agent)
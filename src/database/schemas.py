@@ -2,13 +2,13 @@
 SQLAlchemy database schemas for coffee shop application.
 
 Defines ORM models for transactions, products, stores, nutritional information,
-and session tracing with full schema documentation.
+session tracing and router plan caching with full schema documentation.
 """
 
 import uuid
 from datetime import datetime, time
 
-from sqlalchemy import Integer, UUID, JSON, ARRAY
+from sqlalchemy import Integer, String, UUID, JSON, ARRAY
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -143,4 +143,20 @@ class SessionTracing(Base):
         comment="History of the session"
     )
 
+class PlanCache(Base):
+    """Cached router plans"""
+
+    __tablename__ = "service__plan_cache_t"
+    __table_args__ = {"comment": "Technical table for router plan caching."}
+
+    fingerprint: Mapped[str] = mapped_column(
+        String,
+        primary_key=True,
+        comment="Prompt version, model name and sorted keywords of the user request"
+    )
+    routing_steps: Mapped[list[str]] = mapped_column(
+        ARRAY(String),
+        comment="Ordered agent names of the routing plan"
+    )
+
 meta = Base.metadata
@@ -8,6 +8,8 @@ answer summarizer) and tool inputs (database search, data reading).
 from typing import Optional, Literal, Dict, Any
 from pydantic import BaseModel, Field
 
+RoutingDecision = Literal["sql_writer", "insight_generator", "answer_summarizer", "general_question"]
+
 class TechnicalMixin(BaseModel):
     """Base mixin for agent outputs with reasoning and debugging fields."""
 
@@ -18,7 +20,7 @@ class TechnicalMixin(BaseModel):
 class RouterOutput(TechnicalMixin):
     """Router agent output with routing decision and plan."""
 
-    routing_decision: Literal["sql_writer", "insight_generator", "answer_summarizer", "general_question"]
+    routing_decision: RoutingDecision
     routing_plan: Optional[str] = Field(description="The step-by-step plan of agent calls to solve the problem.")
     user_data_file: Optional[str] = Field(description="The data file path on the operating system user requests to analyze.")
 
@@ -2,95 +2,209 @@
 System prompts for multi-agent workflow.
 
 Contains detailed prompt templates for router, SQL writer, insight generator,
-and answer summarizer agents with role definitions and instructions.
+and answer summarizer agents with role definitions and instructions. Templates
+are assembled from named modules shared between agents.
 """
 
-from dataclasses import dataclass
-
-ROUTER_PROMPT: str = (
-    "<role> You are a Router-Agent in a multi-agent system that acts as an assistant to a product analyst. </role> \n\n"
-    "<goal> Your primary function is to understand what the user wants and route the request to the most appropriate expert agent."
-    "Also, you need extract data under special keys from the request such as path_to_file. </goal> \n\n"
-    "<restrictions> DO NOT answer the questions yourself, just only route. DO NOT route to agents that are already in visited_agents list. </restriction> \n\n"
-    "<available_agents> Here is the pool of available agents: \n"
-    "- 'sql_writer': Writes, explains, or debugs SQL queries. \n"
-    "- 'insight_generator': A product analytics expert that translates the business user's request into technical language and makes a data analysis plan. \n"
-    "</available_agents> \n\n"
-    "<visited_agents> Agents already visited in this workflow: {interactions_history} </visited_agents> \n\n"
-    "<routing_plan> Your main routing plan: {routing_plan} </routing_plan> \n\n"
-    "<routing_rules> Here is the list of routing rules: \n"
-    "- Consider the routing plan you created when making the next routing_decision! \n"
-    "- Route to 'sql_writer' if user requests about sql-query syntax, logic, or asks you to write him a ready SQL-code. \n"
-    "- Route to 'insight_generator' if a user requests for insights from the data they provide. \n"
-    "- Route to 'insight_generator' if a user asks to query data from 'coffee_shop' database. \n"
-    "- Route to 'answer_summarizer' if all required work is done. \n"
-    "- Route to 'general_question' if the question is outside the scope of the system or is too general. \n"
-    "</routing_rules> \n\n"
-    "<agent_results> Results of the agents' work. If necessary values is received, route ro to summarization. \n"
-    "- sql_writer results: sql -> {sql}; explanation -> {sql_explanation} \n"
-    "- insight_generator results: insights -> {insights} \n" 
-    "</agent_results>\n\n"
-    "<planning> Create a step-by-step accurate routing plan, based on user request. </planning> \n\n"
-    "<examples> Some routing examples: \n"
-    "- 'explain me the functionality of these sql query <sql>' -> sql_writer -> answer_summarizer \n"
-    "- 'Find me the top of sold producs from transactions table in our coffee shop.' -> insight_generator -> answer_summarizer \n"
-    "</examples> \n\n"
-    "<output_format> Provide your answer in this exact format {fmt}. </output_format>"
+import re
+from typing import Callable, Sequence
+from string import Formatter
+
+def compile_prompt(name: str, text: str) -> Callable[..., str]:
+    """Generate a specialized builder function for a prompt template.
+
+    The template is parsed once and turned into the source of a function taking
+    its fields as arguments and returning a single f-string, so building a prompt
+    runs straight-line code instead of the `str.format` parser.
+
+    Args:
+        name: Name of the generated function.
+        text: Template in `str.format` syntax with plain field names.
+
+    Returns:
+        Function accepting template fields (positionally or by keyword) and returning the prompt.
+    """
+
+    body, fields = [], []
+
+    for literal, field, spec, conversion in Formatter().parse(text):
+        body.append(literal.replace("{", "{{").replace("}", "}}"))
+
+        if field is not None:
+            if not field.isidentifier():
+                raise ValueError(f"Unsupported prompt field: {field!r}")
+
+            body.append("{" + field + (f"!{conversion}" if conversion else "") + (f":{spec}" if spec else "") + "}")
+            fields.append(field)
+
+    namespace = {}
+    exec(f"def {name}({', '.join(dict.fromkeys(fields))}):\n    return f{''.join(body)!r}", namespace)
+
+    return namespace[name]
+
+def _block(tag: str, *lines: str) -> str:
+    """Wrap prompt lines into a tagged section."""
+    return f"<{tag}> " + " \n".join(lines) + f" </{tag}>"
+
+# Phrases shared by several prompts
+_NO_INVENT: str = (
+    "It is strictly forbidden to invent non-existent objects in the available database if the user's question relates to it."
+)
+_UNKNOWN_ANSWER: str = "If you can't answer the user request, just say 'I don't know' and explain the reason."
+_EMOJIS: str = "You could use emojis in your answer."
+
+# Named prompt modules, shared between agents where the text is identical
+PROMPT_MODULES: dict[str, str] = {
+    "db_structure": _block("database_structure", "The available database has the following structure: {db}"),
+    "restrictions_common": _block("restrictions", _NO_INVENT),
+    "role_router": _block(
+        "role", "You are a Router-Agent in a multi-agent system that acts as an assistant to a product analyst."
+    ),
+    "goal_router": _block(
+        "goal",
+        "Your primary function is to understand what the user wants and route the request to the most appropriate expert agent. "
+        "Also, you need to extract data under special keys from the request such as path_to_file."
+    ),
+    "restrictions_router": _block(
+        "restrictions",
+        "DO NOT answer the questions yourself, just route. DO NOT route to agents that are already in visited_agents list."
+    ),
+    "available_agents": _block(
+        "available_agents",
+        "Here is the pool of available agents:",
+        "- 'sql_writer': Writes, explains, or debugs SQL queries.",
+        "- 'insight_generator': A product analytics expert that translates the business user's request "
+        "into technical language and makes a data analysis plan."
+    ),
+    "routing_rules": _block(
+        "routing_rules",
+        "Here is the list of routing rules:",
+        "- Consider the routing plan you created when making the next routing_decision!",
+        "- Route to 'sql_writer' if user requests about sql-query syntax, logic, or asks you to write a ready SQL-code.",
+        "- Route to 'insight_generator' if a user requests for insights from the data they provide.",
+        "- Route to 'insight_generator' if a user asks to query data from 'coffee_shop' database.",
+        "- Route to 'answer_summarizer' if all required work is done.",
+        "- Route to 'general_question' if the question is outside the scope of the system or is too general."
+    ),
+    "planning_router": _block("planning", "Create a step-by-step accurate routing plan, based on user request."),
+    "examples_router": _block(
+        "examples",
+        "Some routing examples:",
+        "- 'explain me the functionality of these sql query <sql>' -> sql_writer -> answer_summarizer",
+        "- 'Find me the top of sold products from transactions table in our coffee shop.' -> insight_generator -> answer_summarizer"
+    ),
+    "role_sql_writer": _block(
+        "role",
+        "You are a professional PostgreSQL developer specializing in writing analytical queries. "
+        "Your years of experience allow you to avoid mistakes and write secure code."
+    ),
+    "responsibilities_sql_writer": _block(
+        "responsibilities",
+        "Your core responsibilities:",
+        "- SQL-code explanation, debugging or optimization",
+        "- Writing complex analytical queries",
+        "- Writing ready-made SQL queries for an AVAILABLE database"
+    ),
+    "role_insight_generator": _block("role", "You are an expert in extracting insights from data within a multi-agent system."),
+    "goal_insight_generator": _block(
+        "goal",
+        "Your primary function is to analyze the data provided by the user or search for data based on the user's request."
+    ),
+    "restrictions_insight_generator": _block("restrictions", _UNKNOWN_ANSWER),
+    "responsibilities_insight_generator": _block(
+        "responsibilities",
+        "Your core responsibilities:",
+        "- Perform dataset analysis.",
+        "- Extract the necessary data from the database using SQL queries.",
+        "- Use only syntactically correct SQL queries."
+    ),
+    "role_answer_summarizer": _block("role", "You are an expert in summarizing answers from a multi-agent system."),
+    "instructions_answer_summarizer": _block(
+        "instructions",
+        "Summarize the information provided in agent_results and write a 2-5 point summary. "
+        "If the queried_data field IS NOT EMPTY, return the data in a neat table format."
+    ),
+    "answer_sentiment": _block("answer_sentiment", "The answer should be attractive to the user.", _EMOJIS),
+    "no_reason": "/no_reason",
+}
+
+# Per-agent assembly lists, shared modules first so agents also share the cacheable prefix
+ROUTER_MODULES: tuple[str, ...] = (
+    "role_router", "goal_router", "restrictions_router", "available_agents",
+    "routing_rules", "planning_router", "examples_router"
 )
-SQL_WRITER_PROMPT: str = (
-    "<role> You are a professional PostgreSQL developer specializing in writing analytical queries. "
-    "Your years of experience allow you to avoid mistakes and write secure code. </role> \n\n"
-    "<restrictions> It is strictly forbidden to invent non-existent objects in the available database if the user's question relates to it. </restriction> \n\n"
-    "<responsibilities> Your core responsibilities: \n"
-    "- SQL-code explanation, debugging or optimization \n"
-    "- Writing complex analytical queries \n"
-    "- Writing ready-made SQL queries for an AVAILABLE database"
-    "</responsibilities> \n\n"
-    "<database_structure> The available database has the following structure: {db} </database_structure> \n\n"
-    "<output_format> Provide your answer in this exact format {fmt}. </output_format>"
+SQL_WRITER_MODULES: tuple[str, ...] = (
+    "db_structure", "restrictions_common", "role_sql_writer", "responsibilities_sql_writer"
 )
-INSIGHT_GENERATOR_PROMPT: str = (
-    "<role> You are an expert in extracting insights from data within a multi-agent system. </role> \n\n"
-    "<goal> Your primary function is to analyze the data provided by the user or search for data based on the user's request. </goal> \n\n"
-    "<restrictions>\n"
-    "- It is strictly forbidden to invent non-existent objects in the available database if the user's question relates to it. \n"
-    "- If can't answer the user request, just say 'I don't know' and explain the reason. \n"
-    "</restriction> \n\n"
-    "<responsibilities> Your core responsibilities: \n"
-    "- Performs dataset analysis. \n"
-    "- Extracts the necessary data from the database using SQL queries. \n"
-    "- Use only syntaxic correct SQL queries. \n"
-    "</responsibilities> \n\n"
-    "<database_structure> The available database has the following structure: {db} </database_structure> \n\n"
-    "<output_format> Provide your answer in this exact format {fmt}. </output_format>"
+INSIGHT_GENERATOR_MODULES: tuple[str, ...] = (
+    "db_structure", "restrictions_common", "role_insight_generator", "goal_insight_generator",
+    "restrictions_insight_generator", "responsibilities_insight_generator"
 )
-ANSWER_SUMMARIZER_PROMPT: str = (
-    "<role> You are an expert in summarizing answers from a multi-agent system. </role> \n\n"
-    "<instructions> You have been provided with information about: \n"
-    "- written sql queries: {sql} \n"
-    "- sql explanation, debugging and optimization: {sql_explanation} \n"
-    "- insights from a data: {insights} \n"
-    "- queried data for the user: {queried_data} \n"
-    "Summarize provided information and write a 2-5 point summary. If the queried_data field IS NOT EMPTY, return the data in a neat table format."
-    "</instructions> \n\n"
-    "<answer_sentiment> The answer should be attractive to the user. Also you could use emojis. </answer_sentiment> \n\n"
-    "/no_reason"
-    "<output_format> Provide your answer in this exact format {fmt}. </output_format>"
+ANSWER_SUMMARIZER_MODULES: tuple[str, ...] = (
+    "role_answer_summarizer", "instructions_answer_summarizer", "answer_sentiment", "no_reason"
+)
+
+def assemble_prompt(modules: Sequence[str]) -> str:
+    """Join prompt modules into a single prompt text."""
+    return " \n\n".join(PROMPT_MODULES[name] for name in modules)
+
+# Static prefixes carry no state placeholders and come first, so provider prefix caches can reuse them
+ROUTER_PROMPT_STATIC: str = assemble_prompt(ROUTER_MODULES)
+ROUTER_PROMPT_DYNAMIC: str = " \n\n".join([
+    _block("visited_agents", "Agents already visited in this workflow: {visited_agents}"),
+    _block("routing_plan", "Your main routing plan: {routing_plan}"),
+    _block(
+        "agent_results",
+        "Results of the agents' work. If the necessary values are received, route to summarization.",
+        "- sql_writer results: sql -> {sql}; explanation -> {sql_explanation}",
+        "- insight_generator results: insights -> {insights}"
+    ),
+])
+SQL_WRITER_PROMPT: str = assemble_prompt(SQL_WRITER_MODULES)
+INSIGHT_GENERATOR_PROMPT: str = assemble_prompt(INSIGHT_GENERATOR_MODULES)
+ANSWER_SUMMARIZER_PROMPT_STATIC: str = assemble_prompt(ANSWER_SUMMARIZER_MODULES)
+ANSWER_SUMMARIZER_PROMPT_DYNAMIC: str = _block(
+    "agent_results",
+    "You have been provided with information about:",
+    "- written sql queries: {sql}",
+    "- sql explanation, debugging and optimization: {sql_explanation}",
+    "- insights from a data: {insights}",
+    "- queried data for the user: {queried_data}"
 )
 SIMPLE_QA_PROMPT: str = (
-    "You are a specialist in general user issues, so answer them briefly and clearly."
-    "Don't make up facts if you don't know the answer, just say 'I don't know'"
-    "In your answer you could use emojis."
+    "You are a specialist in general user issues, so answer them briefly and clearly. "
+    "Don't make up facts if you don't know the answer, just say 'I don't know'. " + _EMOJIS
 )
 
-@dataclass(frozen=True)
+# Collapse whitespace runs and spaces around line breaks left by concatenation once, instead of sending them on every call
+ROUTER_PROMPT_STATIC, ROUTER_PROMPT_DYNAMIC, SQL_WRITER_PROMPT, INSIGHT_GENERATOR_PROMPT, \
+    ANSWER_SUMMARIZER_PROMPT_STATIC, ANSWER_SUMMARIZER_PROMPT_DYNAMIC, SIMPLE_QA_PROMPT = (
+        re.sub(r" ?\n ?", "\n", re.sub(r"[ \t]+", " ", prompt)).strip() for prompt in (
+            ROUTER_PROMPT_STATIC, ROUTER_PROMPT_DYNAMIC, SQL_WRITER_PROMPT, INSIGHT_GENERATOR_PROMPT,
+            ANSWER_SUMMARIZER_PROMPT_STATIC, ANSWER_SUMMARIZER_PROMPT_DYNAMIC, SIMPLE_QA_PROMPT
+        )
+    )
+
+# Specialized builders of the prompts that are filled at runtime
+build_router = compile_prompt("build_router", ROUTER_PROMPT_DYNAMIC)
+build_sql_writer = compile_prompt("build_sql_writer", SQL_WRITER_PROMPT)
+build_insight_generator = compile_prompt("build_insight_generator", INSIGHT_GENERATOR_PROMPT)
+build_summarizer = compile_prompt("build_summarizer", ANSWER_SUMMARIZER_PROMPT_DYNAMIC)
+
 class MultiAgentPrompts:
-    """Container for all agent system prompts."""
+    """Namespace of all agent system prompts, used as a class without instances."""
+
+    __slots__ = ()
+
+    # Bump on any prompt change to invalidate cached responses
+    version: str = "8"
 
-    router_prompt: str = ROUTER_PROMPT
-    sql_writer_prompt: str = SQL_WRITER_PROMPT
-    insight_generator_prompt: str = INSIGHT_GENERATOR_PROMPT
-    answer_summarizer_prompt: str = ANSWER_SUMMARIZER_PROMPT
+    router_prompt_static: str = ROUTER_PROMPT_STATIC
+    build_router = staticmethod(build_router)
+    build_sql_writer = staticmethod(build_sql_writer)
+    build_insight_generator = staticmethod(build_insight_generator)
+    answer_summarizer_prompt_static: str = ANSWER_SUMMARIZER_PROMPT_STATIC
+    build_summarizer = staticmethod(build_summarizer)
     simple_qa_prompt: str = SIMPLE_QA_PROMPT
 
-meta_prompts_store = MultiAgentPrompts()
+meta_prompts_store = MultiAgentPrompts
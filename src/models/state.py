@@ -9,10 +9,30 @@ import operator
 from typing import (
     TypedDict,
     Optional,
-    Literal,
     Annotated
 )
-from models.io import AnswerSummarizerOutput
+from models.io import AnswerSummarizerOutput, RoutingDecision
+
+# Bits of agents in the 'visited_mask' state field
+AGENT_BITS: dict[str, int] = {"sql_writer": 1, "insight_generator": 2, "answer_summarizer": 4, "general_question": 8}
+
+def decode_visited_mask(mask: int) -> list[str]:
+    """List the agents whose bits are set in a visited mask."""
+    return [agent for agent, bit in AGENT_BITS.items() if mask & bit]
+
+# Upper bound of reasoning traces kept in the state, oldest are dropped first
+REASONING_TRACES_LIMIT = 64
+
+def _extend(current: list, update: list) -> list:
+    """Append the update to the accumulated list in place instead of copying it on every hop."""
+    current.extend(update)
+    return current
+
+def _ring(current: list, update: list) -> list:
+    """Append the update in place and keep only the latest `REASONING_TRACES_LIMIT` items."""
+    current.extend(update)
+    del current[:-REASONING_TRACES_LIMIT]
+    return current
 
 class MultiAgentWorkflow(TypedDict):
     """
@@ -29,13 +49,18 @@ class MultiAgentWorkflow(TypedDict):
 
     # Router artifacts
     routing_plan: Optional[str]
-    routing_decision: Optional[Literal[str]]
+    routing_decision: Optional[RoutingDecision]
     user_data_file: Optional[str]
+    cached_plan_steps: Optional[list[str]]
+    plan_key: Optional[str]
 
     # Insights generator artifacts
     insights: Optional[str]
     queried_data: Optional[str]
 
+    # Set of visited agents as 'AGENT_BITS' flags
+    visited_mask: Annotated[int, operator.or_]
+
     # Tracing fields
-    interactions_history: Annotated[list[str], operator.add]
-    reasoning_traces: Annotated[list[dict[str, str]], operator.add]
+    interactions_history: Annotated[list[str], _extend]
+    reasoning_traces: Annotated[list[dict[str, str]], _ring]